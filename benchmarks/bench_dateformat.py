@@ -0,0 +1,68 @@
+"""
+Benchmarks for shared.utils.dateformat and the daterange template tags.
+
+Usage (from the repository root):
+
+    python -m benchmarks.bench_dateformat --output results.json
+    python -m benchmarks.bench_dateformat --baseline results.json
+"""
+
+import datetime
+import sys
+
+from .common import main
+
+
+DATE_RANGES = {
+    'single_day': (datetime.date(2020, 3, 5), datetime.date(2020, 3, 5)),
+    'same_month': (datetime.date(2020, 3, 5), datetime.date(2020, 3, 20)),
+    'same_year': (datetime.date(2020, 3, 5), datetime.date(2020, 5, 20)),
+    'cross_year': (datetime.date(2020, 12, 28), datetime.date(2021, 1, 3)),
+}
+
+TIME_RANGES = {
+    'full_hours': (datetime.time(10, 0), datetime.time(18, 0)),
+    'with_minutes': (datetime.time(9, 30), datetime.time(17, 45)),
+}
+
+
+def _in_language(lang, func):
+    from django.utils import translation
+
+    def wrapper():
+        with translation.override(lang):
+            func()
+    return wrapper
+
+
+def get_cases():
+    from django.template import Context, Template
+    from shared.utils import dateformat
+
+    date_range_template = Template(
+        "{% load daterange %}{% format_date_range from_date to_date variant %}")
+    time_range_template = Template(
+        "{% load daterange %}{% format_time_range from_time to_time variant %}")
+
+    cases = []
+    for lang in ('de', 'en'):
+        for variant in ('SHORT', 'LONG'):
+            for name, (from_date, to_date) in sorted(DATE_RANGES.items()):
+                prefix = '%s.%s.%s' % (lang, variant, name)
+                cases.append((prefix + '.format_date_range', _in_language(
+                    lang, lambda f=from_date, t=to_date, v=variant: dateformat.format_date_range(f, t, v))))
+                context = Context({'from_date': from_date, 'to_date': to_date, 'variant': variant})
+                cases.append((prefix + '.tag', _in_language(
+                    lang, lambda c=context: date_range_template.render(c))))
+            for name, (from_time, to_time) in sorted(TIME_RANGES.items()):
+                prefix = '%s.%s.time_%s' % (lang, variant, name)
+                cases.append((prefix + '.format_time_range', _in_language(
+                    lang, lambda f=from_time, t=to_time, v=variant: dateformat.format_time_range(f, t, v))))
+                context = Context({'from_time': from_time, 'to_time': to_time, 'variant': variant})
+                cases.append((prefix + '.tag', _in_language(
+                    lang, lambda c=context: time_range_template.render(c))))
+    return cases
+
+
+if __name__ == '__main__':
+    sys.exit(main(__doc__.strip().splitlines()[0], get_cases))
@@ -0,0 +1,46 @@
+"""
+Benchmarks for the slugify and downgrade functions of shared.utils.text.
+
+Usage (from the repository root):
+
+    python -m benchmarks.bench_text --output results.json
+    python -m benchmarks.bench_text --baseline results.json
+
+The "repeated" cases call the function with the same value (memo hits),
+the "distinct" cases cycle through more values than the memo holds.
+"""
+
+import itertools
+import sys
+
+from .common import main
+
+
+VALUES = {
+    'ascii': "Program and Events 2021",
+    'unicode': "Über die Grünen Wiesen – Café Größenwahn",
+}
+
+DISTINCT_VALUES = 20000
+
+
+def _cycle(func, value):
+    values = itertools.cycle(["%s %i" % (value, i) for i in range(DISTINCT_VALUES)])
+    return lambda: func(next(values))
+
+
+def get_cases():
+    from shared.utils import text
+
+    cases = []
+    for func_name in ('downgrade', 'slugify_long', 'downgrading_slugify'):
+        func = getattr(text, func_name)
+        for name, value in sorted(VALUES.items()):
+            prefix = '%s.%s' % (func_name, name)
+            cases.append((prefix + '.repeated', lambda f=func, v=value: f(v)))
+            cases.append((prefix + '.distinct', _cycle(func, value)))
+    return cases
+
+
+if __name__ == '__main__':
+    sys.exit(main(__doc__.strip().splitlines()[0], get_cases))
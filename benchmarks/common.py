@@ -0,0 +1,102 @@
+"""
+Helpers shared by the benchmark scripts.
+
+Each script configures Django with an in-memory settings module, times a
+list of named cases and writes the results as JSON, optionally comparing
+them with a stored baseline.
+"""
+
+import argparse
+import json
+import platform
+import sys
+import timeit
+
+import django
+from django.conf import settings
+
+
+BENCHMARK_SETTINGS = {
+    'INSTALLED_APPS': ['django.contrib.contenttypes', 'shared.utils'],
+    'USE_I18N': True,
+    'USE_L10N': True,
+    'LANGUAGE_CODE': 'de',
+    'LANGUAGES': [('de', 'German'), ('en', 'English')],
+    'FORMAT_MODULE_PATH': ['shared.utils.locale'],
+    'TEMPLATES': [{
+        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'APP_DIRS': True,
+    }],
+}
+
+
+def setup(**extra_settings):
+    if not settings.configured:
+        settings.configure(**dict(BENCHMARK_SETTINGS, **extra_settings))
+        django.setup()
+
+
+def run(cases, number=1000, repeat=5):
+    """
+    Times each (name, function) case and returns a dictionary of the best
+    time per call in microseconds.
+    """
+    results = {}
+    for name, func in cases:
+        func()  # Warm up caches and lazy imports
+        best = min(timeit.repeat(func, number=number, repeat=repeat))
+        results[name] = best / number * 1e6
+    return results
+
+
+def compare(results, baseline, tolerance):
+    """
+    Returns a list of (name, baseline, current, ratio) for all cases which
+    got slower than baseline * (1 + tolerance).
+    """
+    regressions = []
+    for name, current in sorted(results.items()):
+        previous = baseline.get(name)
+        if not previous:
+            continue
+        ratio = current / previous
+        if ratio > 1 + tolerance:
+            regressions.append((name, previous, current, ratio))
+    return regressions
+
+
+def main(description, get_cases, argv=None):
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument('--number', type=int, default=1000, help="Calls per timing run.")
+    parser.add_argument('--repeat', type=int, default=5, help="Timing runs per case, the best one counts.")
+    parser.add_argument('--output', help="Write the results as JSON to this file.")
+    parser.add_argument('--baseline', help="Compare with the results stored in this JSON file.")
+    parser.add_argument('--tolerance', type=float, default=0.1,
+        help="Allowed slowdown compared to the baseline, e.g. 0.1 for 10%%.")
+    args = parser.parse_args(argv)
+
+    setup()
+    results = run(get_cases(), number=args.number, repeat=args.repeat)
+    data = {
+        'python': platform.python_version(),
+        'django': django.get_version(),
+        'unit': 'us/call',
+        'results': results,
+    }
+    output = json.dumps(data, indent=2, sort_keys=True)
+    if args.output:
+        with open(args.output, 'w') as fd:
+            fd.write(output + "\n")
+    else:
+        sys.stdout.write(output + "\n")
+
+    if args.baseline:
+        with open(args.baseline) as fd:
+            baseline = json.load(fd)['results']
+        regressions = compare(results, baseline, args.tolerance)
+        for name, previous, current, ratio in regressions:
+            sys.stderr.write("%s: %.2f -> %.2f us/call (%.0f%% slower)\n" % (
+                name, previous, current, (ratio - 1) * 100))
+        if regressions:
+            return 1
+    return 0
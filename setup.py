@@ -54,7 +54,7 @@ setup(
     license='MIT License',
     platforms=['OS Independent'],
     packages=find_packages(
-        exclude=['tests', 'testapp'],
+        exclude=['tests', 'testapp', 'benchmarks', 'benchmarks.*'],
     ),
     namespace_packages=['shared'],
     include_package_data=True,
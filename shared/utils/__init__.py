@@ -10,3 +10,6 @@ except ImportError:
 
 VERSION = __version__.split('+')
 VERSION = tuple(list(map(int, VERSION[0].split('.'))) + VERSION[1:])
+
+
+default_app_config = 'shared.utils.apps.SharedUtilsConfig'
@@ -0,0 +1,12 @@
+from django.apps import AppConfig
+from django.conf import settings
+
+
+class SharedUtilsConfig(AppConfig):
+    name = 'shared.utils'
+    verbose_name = "Shared Utils"
+
+    def ready(self):
+        if getattr(settings, 'DATEFORMAT_WARM_FORMATS', False):
+            from .dateformat import warm_format_registry
+            warm_format_registry()
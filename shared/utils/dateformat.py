@@ -12,12 +12,19 @@ Adds date and time range functions
 
 import datetime
 import re
+from collections import namedtuple
+from functools import lru_cache
 from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
 from django.utils.dateformat import DateFormat, re_escaped
 from django.utils.formats import get_format
 from django.utils.encoding import force_text
+from django.utils import translation
 from django.utils.translation import ugettext_lazy as _
 
+from .lru import LRUCache
+
 # All get_format call make sure that there is a language code returned
 # (our get_language at least returns FALLBACK_LANGUAGE_CODE), because self-defined
 # translation does not work without it
@@ -25,12 +32,49 @@ from .translation import get_language
 
 
 DEFAULT_VARIANT = getattr(settings, 'DEFAULT_DATE_VARIANT', 'SHORT')
+FORMAT_PROGRAM_CACHE_SIZE = getattr(settings, 'DATEFORMAT_PROGRAM_CACHE_SIZE', 256)
+MEMO_ENABLED = getattr(settings, 'DATEFORMAT_MEMO_ENABLED', False)
+MEMO_SIZE = getattr(settings, 'DATEFORMAT_MEMO_SIZE', 2048)
 
 
 # Adding "q"
 re_formatchars = re.compile(r'(?<!\\)([aAbBcdDeEfFgGhHiIjlLmMnNoOPqrsStTUuwWyYzZ])')
 
 
+@lru_cache(maxsize=FORMAT_PROGRAM_CACHE_SIZE)
+def _compile_format(formatstr):
+    program = []
+    for i, piece in enumerate(re_formatchars.split(formatstr)):
+        if i % 2:
+            program.append((True, piece))
+        elif piece:
+            program.append((False, re_escaped.sub(r'\1', piece)))
+    return tuple(program)
+
+
+def compile_format(formatstr):
+    """
+    Parses a format string into a tuple of (is_method, value) tokens, where
+    value is either a literal chunk or the name of the formatter method to call.
+    Results are kept in a bounded LRU cache.
+
+    >>> compile_format('j.n.Y')
+    ((True, 'j'), (False, '.'), (True, 'n'), (False, '.'), (True, 'Y'))
+    """
+    return _compile_format(force_text(formatstr))
+
+
+def format_program_cache_info():
+    """
+    Returns the hits/misses/maxsize/currsize statistics of the format program cache.
+    """
+    return _compile_format.cache_info()
+
+
+def clear_format_program_cache():
+    _compile_format.cache_clear()
+
+
 class ExtendedFormat(DateFormat):
     def q(self):
         """
@@ -45,11 +89,11 @@ class ExtendedFormat(DateFormat):
 
     def format(self, formatstr):
         pieces = []
-        for i, piece in enumerate(re_formatchars.split(force_text(formatstr))):
-            if i % 2:
-                pieces.append(force_text(getattr(self, piece)()))
-            elif piece:
-                pieces.append(re_escaped.sub(r'\1', piece))
+        for is_method, value in compile_format(formatstr):
+            if is_method:
+                pieces.append(force_text(getattr(self, value)()))
+            else:
+                pieces.append(value)
         return ''.join(pieces)
 
 
@@ -63,15 +107,89 @@ def time_format(value, format=None, use_l10n=None, lang=None):
     # Copy of django.utils.dateformat.time_format, using our extended formatter
     if not lang:
         lang = get_language()
-    tf = ExtendedFormat(value)
-    return tf.format(get_format(format or 'DATE_FORMAT', use_l10n=use_l10n, lang=lang))
+    format = get_format(format or 'DATE_FORMAT', use_l10n=use_l10n, lang=lang)
+    if format == 'q':
+        return format_q(value)
+    return memoize_rendered(
+        ('format', memo_value_key(value), format),
+        lambda: ExtendedFormat(value).format(format))
+
+
+@lru_cache(maxsize=None)
+def _q_table():
+    return tuple(
+        ExtendedFormat(datetime.time(hour, minute)).format('q')
+        for hour in range(24) for minute in range(60))
+
+
+def format_q(value):
+    """
+    Fast path for the proprietary "q" format, using a precomputed table
+    of all 1440 minutes of the day. The "q" output does not depend on the
+    language, therefore one table serves all languages.
+
+    >>> format_q(datetime.time(13, 5))
+    '13:05'
+    """
+    return _q_table()[value.hour * 60 + value.minute]
+
+
+def _format_time(value, format):
+    if format == 'q':
+        return format_q(value)
+    return ExtendedFormat(value).format(format)
 
 
 def date_format(value, format=None, use_l10n=None, lang=None):
     if not lang:
         lang = get_language()
-    df = ExtendedFormat(value)
-    return df.format(get_format(format or 'DATE_FORMAT', use_l10n=use_l10n, lang=lang))
+    format = get_format(format or 'DATE_FORMAT', use_l10n=use_l10n, lang=lang)
+    return memoize_rendered(
+        ('format', memo_value_key(value), format),
+        lambda: ExtendedFormat(value).format(format))
+
+
+#
+# Memo of rendered dates
+
+
+rendered_dates = LRUCache(MEMO_SIZE) if MEMO_ENABLED else None
+
+
+def memo_value_key(value):
+    """
+    Equal datetimes might be in different timezones and render differently.
+    """
+    return (type(value), value, getattr(value, 'tzinfo', None))
+
+
+def memoize_rendered(key, render):
+    """
+    Returns the memoized result of render() for key and the active language,
+    if DATEFORMAT_MEMO_ENABLED is set; otherwise just calls render().
+
+    The key has to contain everything the rendered value depends on,
+    including the resolved formats.
+    """
+    if rendered_dates is None:
+        return render()
+    # Month and day names depend on the active language
+    key = key + (translation.get_language(),)
+    try:
+        hash(key)
+    except TypeError:
+        return render()
+    return rendered_dates.get_or_set(key, render)
+
+
+def rendered_dates_stats():
+    """
+    Returns hits, misses, hit rate, size and approximate memory use of the
+    rendered dates memo, or None if it is not enabled.
+    """
+    if rendered_dates is None:
+        return None
+    return rendered_dates.stats()
 
 
 def _normalize_variant(variant):
@@ -82,6 +200,93 @@ def _normalize_variant(variant):
     return variant.upper()
 
 
+#
+# Resolved format registry
+
+
+ResolvedFormats = namedtuple('ResolvedFormats', [
+    'date', 'day_month', 'day', 'year', 'month', 'year_month', 'separator'])
+
+# Format names, each followed by its deprecated alias (see locale/*/formats.py),
+# and the format used if no format module defines any of them
+RESOLVED_FORMAT_NAMES = (
+    ('date', ('DATE_FORMAT',), 'N j, Y'),
+    ('day_month', ('DAY_MONTH_FORMAT', 'DAYMONTH_FORMAT', 'MONTH_DAY_FORMAT'), 'F j'),
+    ('day', ('DAY_FORMAT', 'DAYONLY_FORMAT'), 'j'),
+    ('year', ('YEAR_FORMAT',), 'Y'),
+    ('month', ('MONTH_FORMAT',), 'F'),
+    ('year_month', ('YEAR_MONTH_FORMAT',), 'F Y'),
+)
+
+_resolved_formats = {}
+
+
+def _lookup_format(names, lang, use_l10n=None):
+    for name in names:
+        value = get_format(name, use_l10n=use_l10n, lang=lang)
+        # get_format returns the name itself if no format module defines it
+        if value and value != name:
+            return value
+    return None
+
+
+def resolve_formats(lang, variant, use_l10n=None):
+    """
+    Resolves all formats for the given language and (normalized) variant,
+    without using the registry.
+
+    Each format is looked up with the variant prefix first, then by its
+    deprecated alias, and finally without the variant prefix. Formats
+    which cannot be found fall back to a default (e.g. 'Y' for the
+    year), only the separator may be None.
+    """
+    values = {}
+    for key, names, default in RESOLVED_FORMAT_NAMES:
+        lookup_names = [variant + name for name in names]
+        if variant:
+            lookup_names += list(names)
+        values[key] = _lookup_format(lookup_names, lang, use_l10n) or default
+    values['separator'] = _lookup_format(['DATE_RANGE_SEPARATOR'], lang, use_l10n)
+    return ResolvedFormats(**values)
+
+
+def get_resolved_formats(lang=None, variant=DEFAULT_VARIANT):
+    """
+    Returns the ResolvedFormats for the language and variant, building
+    the registry entry on first access.
+    """
+    key = (get_language(lang), _normalize_variant(variant))
+    try:
+        return _resolved_formats[key]
+    except KeyError:
+        formats = _resolved_formats[key] = resolve_formats(*key)
+        return formats
+
+
+def warm_format_registry(languages=None, variants=('SHORT', 'LONG', '')):
+    """
+    Resolves the formats of all settings.LANGUAGES in advance.
+    """
+    if languages is None:
+        languages = [code for code, name in settings.LANGUAGES]
+    for lang in languages:
+        for variant in variants:
+            get_resolved_formats(lang, variant)
+
+
+def reset_format_registry():
+    _resolved_formats.clear()
+
+
+@receiver(setting_changed)
+def _reset_format_registry_on_setting_changed(setting, **kwargs):
+    if setting in ('FORMAT_MODULE_PATH', 'USE_L10N', 'LANGUAGES', 'LANGUAGE_CODE') or \
+            setting.endswith('_FORMAT') or setting == 'DATE_RANGE_SEPARATOR':
+        reset_format_registry()
+        if rendered_dates is not None:
+            rendered_dates.clear()
+
+
 def format_date_range(from_date, to_date, variant=DEFAULT_VARIANT):
     """
     >>> import datetime
@@ -97,8 +302,28 @@ def format_date_range(from_date, to_date, variant=DEFAULT_VARIANT):
     if not (from_date or to_date):
         return ""
 
-    variant = _normalize_variant(variant)
+    return _format_date_range(from_date, to_date, get_resolved_formats(variant=variant))
+
 
+def format_date_ranges(pairs, variant=DEFAULT_VARIANT):
+    """
+    Bulk version of format_date_range: Returns an iterator of the formatted
+    ranges for an iterable of (from_date, to_date) pairs.
+
+    The language and the variant formats are resolved once, at call time.
+    """
+    formats = get_resolved_formats(variant=variant)
+
+    def _iter_formatted():
+        for from_date, to_date in pairs:
+            if not (from_date or to_date):
+                yield ""
+            else:
+                yield _format_date_range(from_date, to_date, formats)
+    return _iter_formatted()
+
+
+def _format_date_range(from_date, to_date, formats):
     # Only deal with dates, ignoring time
     def datetime_to_date(dt):
         try:
@@ -108,22 +333,22 @@ def format_date_range(from_date, to_date, variant=DEFAULT_VARIANT):
     from_date = datetime_to_date(from_date)
     to_date = datetime_to_date(to_date)
 
-    from_format = to_format = get_format(variant + 'DATE_FORMAT', lang=get_language())
+    from_format = to_format = formats.date
     if from_date == to_date or not to_date:
-        return date_format(from_date, from_format)
+        return ExtendedFormat(from_date).format(from_format)
     else:
         if (from_date.year == to_date.year):
-            from_format = get_format(variant + 'DAYMONTH_FORMAT', lang=get_language()) or 'd/m/'
+            from_format = formats.day_month or 'd/m/'
             if (from_date.month == to_date.month):
-                from_format = get_format(variant + 'DAYONLY_FORMAT', lang=get_language()) or 'd'
+                from_format = formats.day or 'd'
 
         f = t = ""
         if from_date:
-            f = date_format(from_date, get_format(from_format, lang=get_language()))
+            f = ExtendedFormat(from_date).format(from_format)
         if to_date:
-            t = date_format(to_date, get_format(to_format, lang=get_language()))
+            t = ExtendedFormat(to_date).format(to_format)
 
-        separator = get_format('DATE_RANGE_SEPARATOR', lang=get_language()) or " - "
+        separator = formats.separator or " - "
         return separator.join((f, t))
 
 
@@ -138,7 +363,7 @@ def format_year_range(start_date, end_date, variant=DEFAULT_VARIANT):
     if end_year != start_year:
         end_year_formatted = format_partial_date(year=end_year, variant=variant)
 
-        separator = get_format('DATE_RANGE_SEPARATOR', lang=get_language()) or " - "
+        separator = get_resolved_formats(variant=variant).separator or " - "
         return separator.join((start_year_formatted, end_year_formatted))
     else:
         return start_year_formatted
@@ -151,20 +376,18 @@ def format_time_range(from_time, to_time, variant=DEFAULT_VARIANT):
     if not (from_time or to_time):
         return ""
 
-    variant = _normalize_variant(variant)
-
     from_format = to_format = "q"  # get_format(variant + 'TIME_FORMAT', lang=get_language())
 
     if from_time == to_time or not to_time:
-        return time_format(from_time, get_format(from_format, lang=get_language()))
+        return _format_time(from_time, from_format)
     else:
         f = t = ""
         if from_time:
-            f = time_format(from_time, get_format(from_format, lang=get_language()))
+            f = _format_time(from_time, from_format)
         if to_time:
-            t = time_format(to_time, get_format(to_format, lang=get_language()))
+            t = _format_time(to_time, to_format)
 
-        separator = get_format('DATE_RANGE_SEPARATOR', lang=get_language()) or "–"
+        separator = get_resolved_formats(variant=variant).separator or "–"
         return separator.join((f, t))
 
 
@@ -210,49 +433,96 @@ def format_timespan_range(timespan_object, force_wholeday=False, variant=DEFAULT
     return rv
 
 
-def format_partial_date(year=None, month=None, day=None, variant=DEFAULT_VARIANT, use_l10n=None):
+def _partial_date_parts(year, month, day):
+    """
+    Returns the format key and the date components shown by this format,
+    or None if no component is given.
+    """
     if year and month and day:
-        format_name = 'DATE_FORMAT'
+        return 'date', (year, month, day)
     elif year and month:
-        format_name = 'YEAR_MONTH_FORMAT'
+        return 'year_month', (year, month, None)
     elif month and day:
-        format_name = 'DAY_MONTH_FORMAT'
+        return 'day_month', (None, month, day)
     elif year:
-        format_name = 'YEAR_FORMAT'
+        return 'year', (year, None, None)
     elif month:
-        format_name = 'MONTH_FORMAT'
+        return 'month', (None, month, None)
     elif day:
-        format_name = 'DAY_FORMAT'
+        return 'day', (None, None, day)
+    return None
+
+
+def _format_partial_date_parts(parts, formats):
+    format_key, (year, month, day) = parts
+    return format(datetime.date(year or 2000, month or 1, day or 1), getattr(formats, format_key))
+
+
+def format_partial_date(year=None, month=None, day=None, variant=DEFAULT_VARIANT, use_l10n=None):
+    parts = _partial_date_parts(year, month, day)
+    if not parts:
+        return ""
+
+    if use_l10n is None:
+        formats = get_resolved_formats(variant=variant)
     else:
+        formats = resolve_formats(get_language(), _normalize_variant(variant), use_l10n)
+    return _format_partial_date_parts(parts, formats)
+
+
+def _shorten_partial_start(start, end):
+    """
+    Returns the format key for the start of a partial date range, leaving
+    out the components the end shows anyway (as _format_date_range does).
+    """
+    format_key, (year, month, day) = start
+    end_key, (end_year, end_month, end_day) = end
+    if format_key != end_key:
+        return format_key
+    if format_key == 'date' and year == end_year:
+        return 'day' if month == end_month else 'day_month'
+    elif format_key == 'year_month' and year == end_year:
+        return 'month'
+    elif format_key == 'day_month' and month == end_month:
+        return 'day'
+    return format_key
+
+
+def format_partial_date_range(
+        start_year=None, start_month=None, start_day=None,
+        end_year=None, end_month=None, end_day=None,
+        variant=DEFAULT_VARIANT):
+    """
+    Formats a range of two partial dates, each formatted like
+    format_partial_date. If both dates would be displayed the same
+    (or one is missing), only a single date is rendered. If both dates
+    show the same components and share the year (or month), the start
+    leaves them out, e.g. with the day or day_month format.
+
+    >>> format_partial_date_range(2004, 3, None, 2005, None, None)
+    '3/2004–2005'
+    >>> format_partial_date_range(2004, None, 7, 2004, None, 8)
+    '2004'
+    >>> format_partial_date_range(2004, 3, 1, 2004, 3, 9)
+    '1.–9.3.2004'
+    >>> format_partial_date_range(2004, 3, None, 2004, 5, None)
+    'Mär–5/2004'
+    """
+    start = _partial_date_parts(start_year, start_month, start_day)
+    end = _partial_date_parts(end_year, end_month, end_day)
+    if not (start or end):
         return ""
 
-    name = _normalize_variant(variant) + format_name
-    partial_date_format = get_format(name, use_l10n=use_l10n, lang=get_language())
-    return date_format(datetime.date(year or 2000, month or 1, day or 1), partial_date_format)
-
-
-# TODO Add format_partial_date_range function
-# def format_partial_date_range(
-#         start_year=None, start_month=None, start_day=None,
-#         end_year=None, end_month=None, end_day=None,
-#         variant=DEFAULT_VARIANT):
-#     if start_year and start_month and start_day:
-#         format_name = 'DATE_FORMAT'
-#     elif start_year and start_month:
-#         format_name = 'YEARMONTH_FORMAT'
-#     elif start_month and start_day:
-#         format_name = 'DAYMONTH_FORMAT'
-#     elif start_year:
-#         format_name = 'YEAR_FORMAT'
-#     elif start_month:
-#         format_name = 'MONTH_FORMAT'
-#     elif start_day:
-#         format_name = 'DAYONLY_FORMAT'
-
-#     name = _normalize_variant(variant) + format_name
-#     # TODO Django bug or what? Sometimes get_language returns None, therefore force a language here
-#     partial_date_format = get_format(name, lang=get_language() or settings.LANGUAGE_CODE)
-#     return date_format(datetime.date(start_year or 2000, start_month or 1, start_day or 1), partial_date_format)
+    formats = get_resolved_formats(variant=variant)
+    if not end or start == end:
+        return _format_partial_date_parts(start, formats)
+    elif not start:
+        return _format_partial_date_parts(end, formats)
+    else:
+        separator = formats.separator or "–"
+        return separator.join((
+            _format_partial_date_parts((_shorten_partial_start(start, end), start[1]), formats),
+            _format_partial_date_parts(end, formats)))
 
 
 def _test():
@@ -0,0 +1,199 @@
+# -*- coding: utf-8 -*-
+"""
+Vectorised counterpart of shared.utils.dateformat for NumPy datetime64
+arrays (e.g. pandas columns), mainly for large CSV/XLSX exports.
+
+NumPy is an optional dependency; it is only needed when calling
+format_datetime64.
+"""
+from __future__ import unicode_literals
+
+from django.utils.dates import MONTHS, MONTHS_3, MONTHS_ALT, MONTHS_AP, WEEKDAYS, WEEKDAYS_ABBR
+from django.utils.formats import get_format
+from django.utils.translation import ugettext as _
+
+from .dateformat import compile_format
+from .translation import get_language
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+SUPPORTED_FORMAT_CHARS = 'aAbdDEfFgGhHijlLmMnNPqsStuwyYz'
+
+
+class _Components(object):
+    """
+    Lazily computed date and time components of a datetime64[us] array.
+    """
+
+    def __init__(self, values):
+        self.values = values
+
+    def __getattr__(self, name):
+        if name.startswith('_'):
+            raise AttributeError(name)
+        value = getattr(self, '_get_' + name)()
+        setattr(self, name, value)
+        return value
+
+    def _get_days(self):
+        return self.values.astype('datetime64[D]')
+
+    def _get_months(self):
+        return self.values.astype('datetime64[M]')
+
+    def _get_year(self):
+        return self.values.astype('datetime64[Y]').astype('int64') + 1970
+
+    def _get_month(self):
+        return self.months.astype('int64') % 12 + 1
+
+    def _get_day(self):
+        return (self.days - self.months).astype('int64') + 1
+
+    def _get_weekday(self):
+        # Monday is 0, 1970-01-01 was a Thursday
+        return (self.days.astype('int64') + 3) % 7
+
+    def _get_microseconds_of_day(self):
+        return (self.values - self.days).astype('int64')
+
+    def _get_hour(self):
+        return self.microseconds_of_day // 3600000000
+
+    def _get_minute(self):
+        return self.microseconds_of_day // 60000000 % 60
+
+    def _get_second(self):
+        return self.microseconds_of_day // 1000000 % 60
+
+    def _get_microsecond(self):
+        return self.microseconds_of_day % 1000000
+
+    def _get_hour12(self):
+        hour12 = self.hour % 12
+        return np.where(hour12 == 0, 12, hour12)
+
+    def _get_is_leap(self):
+        year = self.year
+        return (year % 4 == 0) & ((year % 100 != 0) | (year % 400 == 0))
+
+
+def _str(values):
+    return values.astype(str)
+
+
+def _zero_padded(values, width=2):
+    return np.char.zfill(_str(values), width)
+
+
+def _lookup(table, index):
+    return np.array([str(value) for value in table])[index]
+
+
+def _month_names(mapping):
+    return [''] + [mapping[month] for month in range(1, 13)]
+
+
+def _hours_minutes(hour, c):
+    "Hours, with minutes left off if they're zero"
+    return np.where(c.minute == 0, _str(hour), np.char.add(np.char.add(_str(hour), ':'), _zero_padded(c.minute)))
+
+
+def _am_pm(c):
+    return np.where(c.hour > 11, _('p.m.'), _('a.m.'))
+
+
+def _ordinal_suffix(c):
+    last = c.day % 10
+    suffix = np.select([last == 1, last == 2, last == 3], ['st', 'nd', 'rd'], 'th')
+    return np.where((c.day >= 11) & (c.day <= 13), 'th', suffix)
+
+
+def _day_of_year(c):
+    return (c.days - c.values.astype('datetime64[Y]').astype('datetime64[D]')).astype('int64') + 1
+
+
+def _two_digit_year(c):
+    years, inverse = np.unique(c.year, return_inverse=True)
+    return np.array([str(year)[2:] for year in years])[inverse.reshape(c.year.shape)]
+
+
+def _f(c):
+    return _hours_minutes(c.hour12, c)
+
+
+def _P(c):
+    return np.select(
+        [(c.minute == 0) & (c.hour == 0), (c.minute == 0) & (c.hour == 12)],
+        [_('midnight'), _('noon')],
+        np.char.add(np.char.add(_f(c), ' '), _am_pm(c)))
+
+
+FORMATTERS = {
+    'a': _am_pm,
+    'A': lambda c: np.where(c.hour > 11, _('PM'), _('AM')),
+    'b': lambda c: _lookup(_month_names(MONTHS_3), c.month),
+    'd': lambda c: _zero_padded(c.day),
+    'D': lambda c: _lookup([WEEKDAYS_ABBR[i] for i in range(7)], c.weekday),
+    'E': lambda c: _lookup(_month_names(MONTHS_ALT), c.month),
+    'f': _f,
+    'F': lambda c: _lookup(_month_names(MONTHS), c.month),
+    'g': lambda c: _str(c.hour12),
+    'G': lambda c: _str(c.hour),
+    'h': lambda c: _zero_padded(c.hour12),
+    'H': lambda c: _zero_padded(c.hour),
+    'i': lambda c: _zero_padded(c.minute),
+    'j': lambda c: _str(c.day),
+    'l': lambda c: _lookup([WEEKDAYS[i] for i in range(7)], c.weekday),
+    'L': lambda c: _str(c.is_leap),
+    'm': lambda c: _zero_padded(c.month),
+    'M': lambda c: _lookup([str(name).title() for name in _month_names(MONTHS_3)], c.month),
+    'n': lambda c: _str(c.month),
+    'N': lambda c: _lookup(_month_names(MONTHS_AP), c.month),
+    'P': _P,
+    'q': lambda c: _hours_minutes(c.hour, c),
+    's': lambda c: _zero_padded(c.second),
+    'S': _ordinal_suffix,
+    't': lambda c: _zero_padded(((c.months + 1).astype('datetime64[D]') - c.months.astype('datetime64[D]')).astype('int64')),
+    'u': lambda c: _zero_padded(c.microsecond, 6),
+    'w': lambda c: _str((c.weekday + 1) % 7),
+    'y': _two_digit_year,
+    'Y': lambda c: _str(c.year),
+    'z': lambda c: _str(_day_of_year(c)),
+}
+
+
+def format_datetime64(values, format=None, use_l10n=None, lang=None):
+    """
+    Vectorised version of shared.utils.dateformat.date_format: Formats an
+    array of datetime64 values (or anything numpy.asarray converts to one)
+    and returns an array of strings.
+
+    Only the format characters in SUPPORTED_FORMAT_CHARS are available;
+    timezone related ones raise ValueError. NaT values are formatted as
+    empty strings.
+    """
+    if np is None:
+        raise ImportError("format_datetime64 requires NumPy.")
+    if not lang:
+        lang = get_language()
+    program = compile_format(get_format(format or 'DATE_FORMAT', use_l10n=use_l10n, lang=lang))
+
+    values = np.asarray(values).astype('datetime64[us]')
+    is_nat = np.isnat(values)
+    components = _Components(np.where(is_nat, np.datetime64(0, 'us'), values))
+
+    rv = np.full(values.shape, '', dtype=str)
+    for is_method, value in program:
+        if is_method:
+            try:
+                formatter = FORMATTERS[value]
+            except KeyError:
+                raise ValueError("Format character '%s' is not supported by format_datetime64." % value)
+            value = formatter(components)
+        rv = np.char.add(rv, value)
+    return np.where(is_nat, '', rv)
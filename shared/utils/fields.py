@@ -1,8 +1,12 @@
 # -*- coding: utf-8 -*-
 from __future__ import unicode_literals
 
+import hashlib
 import re
 
+from django.db import connections, router
+from django.db.models import Q
+
 from .text import slugify
 
 
@@ -10,45 +14,122 @@ from .text import slugify
 from .models.slugs import AutoSlugField
 
 
-def uniquify_field_value(instance, field_name, value, max_length=None, queryset=None):
+# Maximum number of prefixes uniquify_field_values filters by per query
+UNIQUIFY_MAX_PREFIXES = 100
+
+
+def lock_field_value(queryset, field_name, value):
     """
-    Makes a char field value unique by appending an index, taking care of the
-    field's max length.
+    Takes a PostgreSQL transaction level advisory lock for the value of
+    the field, so that concurrent transactions allocating the same value
+    wait for each other. Does nothing on other databases.
 
-    FIXME Doesn't work with model inheritance, where the field is part of the parent class.
+    The lock is released at the end of the transaction; in autocommit mode
+    that is right away, so call it inside transaction.atomic together with
+    the write of the value.
     """
-    def get_similar_values(value):
-        return queryset.exclude(pk=instance.pk) \
-            .filter(**{"%s__istartswith" % field_name: value}).values_list(field_name, flat=True)
+    connection = connections[queryset.db]
+    if connection.vendor != 'postgresql':
+        return
+    name = "{}.{}:{}".format(queryset.model._meta.db_table, field_name, value.lower())
+    key = int.from_bytes(hashlib.md5(name.encode('utf-8')).digest()[:8], 'big', signed=True)
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT pg_advisory_xact_lock(%s)", [key])
 
-    if not value:
-        raise ValueError("Cannot uniquify empty value")
-        # TODO Instead get value from instance.field, or use a default value?
-    if not max_length:
-        max_length = instance._meta.get_field(field_name).max_length
-    if not queryset:
-        queryset = instance._meta.default_manager.get_queryset()
 
+def _split_counter(value):
     # Find already existing counter
     m = re.match(r'(.+)(-\d+)$', value)
     if m:
         base_value, counter = m.groups()
-        index = int(counter.strip("-")) + 1
+        return base_value, int(counter.strip("-")) + 1
     else:
-        base_value = value
-        index = 2  # Begin appending "-2"
+        return value, 2  # Begin appending "-2"
+
+
+def _get_uniquify_prefix(value, max_length):
+    # Prefix of all values the base might get truncated to, leaving room
+    # for a counter of up to 7 digits
+    base_value, index = _split_counter(value)
+    return base_value[:max(max_length - len("-9999999"), 1)]
+
 
-    similar_values = get_similar_values(value)
+def _find_unique_value(value, max_length, prefix, similar_values, get_similar_values):
+    base_value, index = _split_counter(value)
     while value in similar_values or len(value) > max_length:
         value = "%s-%i" % (base_value, index)
         if len(value) > max_length:
             base_value = base_value[:-(len(value) - max_length)]
             value = "%s-%i" % (base_value, index)
-            similar_values = get_similar_values(base_value)
+            if not base_value.startswith(prefix):
+                prefix = base_value
+                similar_values = similar_values | get_similar_values(prefix)
         index += 1
     return value
 
 
+def uniquify_field_value(instance, field_name, value, max_length=None, queryset=None, lock=False):
+    """
+    Makes a char field value unique by appending an index, taking care of the
+    field's max length.
+
+    The existing values are fetched with a single query, the next free index
+    is looked up in Python.
+
+    lock: Take an advisory lock for the base value on PostgreSQL (see
+          lock_field_value), only useful inside a transaction which also
+          writes the value.
+
+    FIXME Doesn't work with model inheritance, where the field is part of the parent class.
+    """
+    def get_similar_values(value):
+        return set(queryset.exclude(pk=instance.pk)
+            .filter(**{"%s__istartswith" % field_name: value}).values_list(field_name, flat=True))
+
+    if not value:
+        raise ValueError("Cannot uniquify empty value")
+        # TODO Instead get value from instance.field, or use a default value?
+    if not max_length:
+        max_length = instance._meta.get_field(field_name).max_length
+    if queryset is None:
+        queryset = instance._meta.default_manager.db_manager(
+            router.db_for_write(type(instance), instance=instance)).get_queryset()
+
+    prefix = _get_uniquify_prefix(value, max_length)
+    if lock:
+        lock_field_value(queryset, field_name, prefix)
+    return _find_unique_value(value, max_length, prefix, get_similar_values(prefix), get_similar_values)
+
+
+def uniquify_field_values(queryset, field_name, values, max_length):
+    """
+    Batch version of uniquify_field_value: Makes a list of values unique
+    against the values in the queryset and against each other, fetching
+    the existing values with one query per UNIQUIFY_MAX_PREFIXES distinct
+    base values.
+    """
+    def get_similar_values(*prefixes):
+        filters = Q()
+        for prefix in prefixes:
+            filters |= Q(**{"%s__istartswith" % field_name: prefix})
+        return set(queryset.filter(filters).values_list(field_name, flat=True))
+
+    if not all(values):
+        raise ValueError("Cannot uniquify empty value")
+    prefixes = {value: _get_uniquify_prefix(value, max_length) for value in values}
+    distinct_prefixes = sorted(set(prefixes.values()))
+    similar_values = set()
+    for i in range(0, len(distinct_prefixes), UNIQUIFY_MAX_PREFIXES):
+        similar_values |= get_similar_values(*distinct_prefixes[i:i + UNIQUIFY_MAX_PREFIXES])
+
+    unique_values = []
+    for value in values:
+        value = _find_unique_value(value, max_length, prefixes[value], similar_values, get_similar_values)
+        similar_values.add(value)
+        unique_values.append(value)
+    return unique_values
+
+
 # TODO Remove alias
 def unique_slug(instance, slug_field, slug_value, max_length=50, queryset=None):
     slug_value = slugify(slug_value)
@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+import sys
+import threading
+from collections import OrderedDict
+
+
+_missing = object()
+
+
+class LRUCache(object):
+    """
+    Thread-safe, size-bounded mapping which evicts the least recently used
+    entries and counts hits and misses.
+    """
+
+    def __init__(self, maxsize=128):
+        self.maxsize = maxsize
+        self.hits = self.misses = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._data)
+
+    def get(self, key, default=None):
+        with self._lock:
+            value = self._data.get(key, _missing)
+            if value is _missing:
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def get_or_set(self, key, func):
+        """
+        Returns the cached value for key, calling func() to compute
+        and store it on a miss.
+        """
+        value = self.get(key, _missing)
+        if value is _missing:
+            value = func()
+            self.set(key, value)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.hits = self.misses = 0
+
+    def stats(self):
+        """
+        Returns a dictionary with the hit/miss counters, the hit rate and
+        the approximate memory use of the keys and values in bytes.
+        """
+        with self._lock:
+            items = list(self._data.items())
+            hits, misses = self.hits, self.misses
+        memory = sys.getsizeof(self._data) + sum(
+            sys.getsizeof(key) + sys.getsizeof(value) for key, value in items)
+        lookups = hits + misses
+        return {
+            'hits': hits,
+            'misses': misses,
+            'hit_rate': float(hits) / lookups if lookups else 0.0,
+            'size': len(items),
+            'maxsize': self.maxsize,
+            'memory': memory,
+        }
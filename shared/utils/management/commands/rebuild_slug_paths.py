@@ -0,0 +1,89 @@
+# -*- coding: utf-8 -*-
+
+"""Recompute the slug_path of all nodes of SlugTreeMixin models.
+
+Walks each tree in tree order, carrying the slug parts of the ancestors,
+so that every node is read once, and writes the changed paths with
+batched UPDATE queries (no save signals are sent). Useful after data
+imports or raw updates of slug, parent or has_url.
+"""
+
+from django.apps import apps
+from django.core.management.base import BaseCommand, CommandError
+from django.db import router, transaction
+
+from ...models.slugs import SlugTreeMixin, iter_changed_slug_paths
+
+
+class Command(BaseCommand):
+    help = "Rebuild the slug paths of SlugTreeMixin models."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'models', nargs='*', metavar='app_label.ModelName',
+            help="Models to rebuild, defaults to all SlugTreeMixin models.")
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help="Number of nodes read and updated per query (default: 1000).")
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help="Only report the changed slug paths, don't save them.")
+
+    def get_models(self, labels):
+        if not labels:
+            return [model for model in apps.get_models()
+                    if issubclass(model, SlugTreeMixin) and not model._meta.proxy]
+        models = []
+        for label in labels:
+            try:
+                model = apps.get_model(label)
+            except (LookupError, ValueError) as e:
+                raise CommandError(str(e))
+            if not issubclass(model, SlugTreeMixin):
+                raise CommandError("{} is not a SlugTreeMixin model.".format(label))
+            models.append(model)
+        return models
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        if batch_size < 1:
+            raise CommandError("--batch-size must be a positive number.")
+        for model in self.get_models(options['models']):
+            using = router.db_for_write(model)
+            if options['dry_run']:
+                self.rebuild(model, using, batch_size, options)
+            else:
+                with transaction.atomic(using=using):
+                    self.rebuild(model, using, batch_size, options)
+
+    def rebuild(self, model, using, batch_size, options):
+        verbosity = options['verbosity']
+        label = model._meta.label
+        total = model._base_manager.using(using).count()
+        rows = model._get_slug_tree_rows().using(using).iterator(chunk_size=batch_size)
+        processed = changed = 0
+        batch = []
+
+        def counted(rows):
+            nonlocal processed
+            for row in rows:
+                processed += 1
+                if verbosity >= 2 and processed % batch_size == 0:
+                    self.stdout.write("{}: {}/{} nodes, {} changed".format(label, processed, total, changed))
+                yield row
+
+        for pk, slug_path in iter_changed_slug_paths(counted(rows)):
+            changed += 1
+            if verbosity >= 3:
+                self.stdout.write("{} {}: {}".format(label, pk, slug_path))
+            if not options['dry_run']:
+                batch.append((pk, slug_path))
+                if len(batch) >= batch_size:
+                    model._update_slug_paths(batch, using=using, batch_size=batch_size)
+                    batch = []
+        if batch:
+            model._update_slug_paths(batch, using=using, batch_size=batch_size)
+
+        if verbosity >= 1:
+            self.stdout.write("{}: {} of {} slug paths {}.".format(
+                label, changed, total, "would be changed" if options['dry_run'] else "changed"))
@@ -0,0 +1,40 @@
+import asyncio
+
+from .translation import set_request_language, reset_request_language
+
+
+def request_language_middleware(get_response):
+    """
+    Resolves the request's language once and makes it available to the
+    language helpers in shared.utils.translation (and thereby all date
+    and translation helpers) for the duration of the request.
+
+    Works with both WSGI and ASGI (Django 3.1 or later). Add it after
+    django.middleware.locale.LocaleMiddleware:
+
+        MIDDLEWARE = [
+            ...
+            'django.middleware.locale.LocaleMiddleware',
+            'shared.utils.middleware.request_language_middleware',
+            ...
+        ]
+    """
+    if asyncio.iscoroutinefunction(get_response):
+        async def middleware(request):
+            token = set_request_language()
+            try:
+                return await get_response(request)
+            finally:
+                reset_request_language(token)
+    else:
+        def middleware(request):
+            token = set_request_language()
+            try:
+                return get_response(request)
+            finally:
+                reset_request_language(token)
+    return middleware
+
+
+request_language_middleware.sync_capable = True
+request_language_middleware.async_capable = True
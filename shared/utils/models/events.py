@@ -5,7 +5,7 @@ from django.db import models
 from django.utils.translation import ugettext_lazy as _
 
 from ..conf import USE_TRANSLATABLE_FIELDS
-from ..dateformat import format_partial_date, format_date_range
+from ..dateformat import format_partial_date, format_partial_date_range, format_date_range
 from ..dates import get_last_of_month
 
 
@@ -82,22 +82,17 @@ class RuntimeBehaviour:
     get_until_display.short_description = _("until")
 
     def get_runtime_display(self):
-        # TODO Improve
         if self.runtime_text:
             return self.runtime_text
         elif self.from_day_value and self.from_month_value:
             return format_date_range(self.from_date, self.until_date)
-        else:
-            f = self.get_from_display()
+        elif self.from_date == self.until_date:
             # Single point
-            if self.from_date == self.until_date:
-                return f
-
-            u = self.get_until_display()
-            if f and u and not f == u:
-                return "{}–{}".format(f, u)
-            else:
-                return f or u
+            return self.get_from_display()
+        else:
+            return format_partial_date_range(
+                self.from_year_value, self.from_month_value, self.from_day_value,
+                self.until_year_value, self.until_month_value, self.until_day_value)
 
 
 class RuntimeMixin(RuntimeBehaviour, models.Model):
@@ -2,10 +2,10 @@
 from __future__ import unicode_literals
 
 from django.conf import settings
-from django.core import validators
-from django.db import models
+from django.core import checks, validators
+from django.db import IntegrityError, connections, models, router, transaction
 from django.db.models import fields as django_fields
-from django.db.models.signals import pre_save, post_save
+from django.db.models.signals import class_prepared, pre_save, post_save
 from django.dispatch import receiver
 from django.utils import six
 from django.utils.translation import ugettext_lazy as _
@@ -18,6 +18,11 @@ if six.PY3:
     from functools import reduce
 
 
+# Rows per UPDATE statement when rewriting slug paths
+SLUG_PATH_BATCH_SIZE = 1000
+
+UNIQUE_SLUG_SAVE_ATTEMPTS = getattr(settings, 'UNIQUE_SLUG_SAVE_ATTEMPTS', 5)
+
 SLUG_HELP = _("Kurzfassung des Namens für die Adresszeile im Browser. Vorzugsweise englisch, keine Umlaute, nur Bindestrich als Sonderzeichen.")
 
 
@@ -36,6 +41,10 @@ class AutoSlugField(django_fields.SlugField):
 
     populate_from: Field name
     unique_slug: Boolean, automatically make the field value unique
+    advisory_lock: Boolean, serialize the allocation of unique values with
+                   an advisory lock per base value (PostgreSQL only). The
+                   lock is held until the end of the transaction, so the
+                   model has to use UniqueSlugMixin, which saves in one.
     """
 
     def __init__(self, *args, **kwargs):
@@ -44,16 +53,31 @@ class AutoSlugField(django_fields.SlugField):
         if 'populate_from' in kwargs:
             self.populate_from = kwargs.pop('populate_from')
         self.unique_slug = kwargs.pop('unique_slug', False)
+        self.advisory_lock = kwargs.pop('advisory_lock', False)
         # FIXME Enforce unique=True
         # if self.unique_slug:
         #     kwargs['unique'] = True
         # TODO Refactor: We need a sibling FormField which also does our pre_save work and then validates correctly (called from Model.clean_fields)
         super(AutoSlugField, self).__init__(*args, **kwargs)
 
+    def check(self, **kwargs):
+        errors = super(AutoSlugField, self).check(**kwargs)
+        if self.advisory_lock and not issubclass(self.model, UniqueSlugMixin):
+            errors.append(checks.Error(
+                "advisory_lock=True requires the model to use UniqueSlugMixin.",
+                hint="Without a transaction around the save the lock is released before the row is written.",
+                obj=self,
+                id='shared.utils.E001',
+            ))
+        return errors
+
     def slugify(self, value):
         return slugify(value)
 
-    def pre_save(self, model_instance, add):
+    def get_slug_value(self, model_instance):
+        """
+        Returns the populated and slugified value, before making it unique.
+        """
         value = getattr(model_instance, self.attname)
         if not value:
             if hasattr(self, 'populate_from'):
@@ -68,13 +92,58 @@ class AutoSlugField(django_fields.SlugField):
         value = self.slugify(value)
         if not value and not self.blank:
             value = model_instance._meta.model_name
+        return value
+
+    def pre_save(self, model_instance, add):
+        # Value allocated by populate_slug_fields (e.g. for bulk_create),
+        # used once as long as it wasn't changed since
+        populated = model_instance.__dict__.get('_populated_slugs', {}).pop(self.attname, None)
+        if populated is not None and populated == getattr(model_instance, self.attname):
+            return populated
+
+        value = self.get_slug_value(model_instance)
         if self.unique_slug:
             # TODO Move import to top of file once AutoSlugField is removed from shared.utils.fields and we no longer have a circular import
             from ..fields import uniquify_field_value
-            return uniquify_field_value(
-                model_instance, self.name, value, max_length=self.max_length)
-        else:
-            return value
+            value = uniquify_field_value(
+                model_instance, self.name, value, max_length=self.max_length,
+                lock=self.advisory_lock)
+        setattr(model_instance, self.attname, value)
+        return value
+
+
+def populate_slug_fields(instances, using=None):
+    """
+    Fills in the AutoSlugFields of a list of instances of the same model
+    like AutoSlugField.pre_save does, e.g. before QuerySet.bulk_create.
+
+    Unique slugs are made unique against the database and against each
+    other, with one query per field and 100 distinct slugs (see
+    uniquify_field_values). The allocated values are remembered
+    on the instances, so that the next pre_save (which bulk_create calls
+    for every instance) uses them without querying again, unless the
+    value was changed in the meantime.
+    """
+    # TODO Move import to top of file once AutoSlugField is removed from shared.utils.fields and we no longer have a circular import
+    from ..fields import uniquify_field_values
+
+    instances = list(instances)
+    if not instances:
+        return instances
+    model = type(instances[0])
+    using = using or router.db_for_write(model)
+    pks = [instance.pk for instance in instances if instance.pk is not None]
+    for field in model._meta.concrete_fields:
+        if not isinstance(field, AutoSlugField):
+            continue
+        values = [field.get_slug_value(instance) for instance in instances]
+        if field.unique_slug:
+            queryset = model._default_manager.using(using).exclude(pk__in=pks)
+            values = uniquify_field_values(queryset, field.name, values, field.max_length)
+        for instance, value in zip(instances, values):
+            setattr(instance, field.attname, value)
+            instance.__dict__.setdefault('_populated_slugs', {})[field.attname] = value
+    return instances
 
 
 class DowngradingSlugField(AutoSlugField):
@@ -109,6 +178,48 @@ class DowngradingSlugField(AutoSlugField):
         return field
 
 
+class UniqueSlugMixin(models.Model):
+    """
+    Race-safe allocation of `unique_slug` AutoSlugField values: Saves in a
+    savepoint and, if another transaction stored the same slug in the
+    meantime, retries with the next free value (up to
+    settings.UNIQUE_SLUG_SAVE_ATTEMPTS times).
+
+    The retry relies on a unique constraint for the field; without one
+    use `advisory_lock=True` on PostgreSQL.
+    """
+
+    class Meta:
+        abstract = True
+
+    def _get_unique_slug_fields(self):
+        return [f for f in self._meta.concrete_fields
+                if isinstance(f, AutoSlugField) and f.unique_slug]
+
+    def _has_duplicate_slug(self, fields, using):
+        for f in fields:
+            value = getattr(self, f.attname)
+            if value and type(self)._default_manager.using(using) \
+                    .filter(**{f.attname: value}).exclude(pk=self.pk).exists():
+                return True
+        return False
+
+    def save(self, *args, **kwargs):
+        fields = self._get_unique_slug_fields()
+        if not fields:
+            return super().save(*args, **kwargs)
+        using = kwargs.get('using') or router.db_for_write(type(self), instance=self)
+        for attempt in range(UNIQUE_SLUG_SAVE_ATTEMPTS):
+            try:
+                with transaction.atomic(using=using):
+                    return super().save(*args, **kwargs)
+            except IntegrityError:
+                # The fields keep the failed value, so the next pre_save
+                # continues with the next index
+                if attempt == UNIQUE_SLUG_SAVE_ATTEMPTS - 1 or not self._has_duplicate_slug(fields, using):
+                    raise
+
+
 class SlugTreeMixin(DirtyFieldsMixin, models.Model):
     """
     Expects a `slug` and a `parent` field.
@@ -137,41 +248,137 @@ class SlugTreeMixin(DirtyFieldsMixin, models.Model):
     class Meta:
         abstract = True
 
-    def _get_slug_path(self):
+    def _get_ancestors_slug_parts(self):
         if self.pk:
             ancestors = self.get_ancestors(include_self=False).filter(has_url=True).values_list('slug', flat=True)
-            parts = list(ancestors)
+            return list(ancestors)
+        elif self.parent_id:
+            # New node, the tree fields might not be set yet
+            parts = self.parent._get_ancestors_slug_parts()
+            if self.parent.has_url:
+                parts.append(self.parent.slug)
+            return parts
         else:
-            parts = []
+            return []
+
+    def _get_slug_path(self):
+        parts = self._get_ancestors_slug_parts()
         if self.slug:
             parts += [self.slug]
         return "/".join(parts)
 
+    @classmethod
+    def _get_slug_tree_rows(cls):
+        """
+        Returns the (pk, tree id, left, right, slug, has_url, slug_path)
+        rows of all nodes in tree order, as used by iter_changed_slug_paths.
+        """
+        opts = cls._mptt_meta
+        # The base manager, the stack walk needs all nodes of a tree
+        return cls._base_manager \
+            .order_by(opts.tree_id_attr, opts.left_attr) \
+            .values_list('pk', opts.tree_id_attr, opts.left_attr, opts.right_attr,
+                         'slug', 'has_url', 'slug_path')
+
+    @classmethod
+    def _update_slug_paths(cls, changes, using=None, batch_size=SLUG_PATH_BATCH_SIZE):
+        """
+        Writes a list of (pk, slug_path) with one UPDATE statement per
+        batch, like QuerySet.bulk_update but without instantiating the
+        models, and without sending save signals.
+        """
+        field = cls._meta.get_field('slug_path')
+        connection = connections[using or router.db_for_write(cls)]
+        qn = connection.ops.quote_name
+        pk_column = qn(field.model._meta.pk.column)
+        # Each row needs three query parameters
+        max_query_params = connection.features.max_query_params
+        if max_query_params:
+            batch_size = min(batch_size, max_query_params // 3)
+        with connection.cursor() as cursor:
+            for i in range(0, len(changes), batch_size):
+                batch = changes[i:i + batch_size]
+                sql = "UPDATE {} SET {} = CASE {} {} END WHERE {} IN ({})".format(
+                    qn(field.model._meta.db_table), qn(field.column), pk_column,
+                    " ".join(["WHEN %s THEN %s"] * len(batch)),
+                    pk_column, ", ".join(["%s"] * len(batch)))
+                params = [value for change in batch for value in change]
+                params += [pk for pk, slug_path in batch]
+                cursor.execute(sql, params)
+
     def _rebuild_descendants_slug_path(self):
-        for p in self.get_descendants():
-            p.slug_path = p._get_slug_path()
-            p.save()
+        """
+        Recomputes the `slug_path` of all descendants in memory, walking
+        them in tree order, and writes the changed values back with
+        batched updates, without sending save signals.
+        """
+        opts = self._mptt_meta
+        using = router.db_for_write(type(self), instance=self)
+        parts = self._get_ancestors_slug_parts()
+        if self.has_url:
+            parts.append(self.slug)
+
+        stack = [(getattr(self, opts.tree_id_attr), getattr(self, opts.right_attr),
+                  "/".join(parts) if parts else None)]
+        descendants = self._get_slug_tree_rows().using(using).filter(**{
+            opts.tree_id_attr: getattr(self, opts.tree_id_attr),
+            '%s__gt' % opts.left_attr: getattr(self, opts.left_attr),
+            '%s__lt' % opts.left_attr: getattr(self, opts.right_attr),
+        })
+        changes = list(iter_changed_slug_paths(descendants, stack))
+        if changes:
+            with transaction.atomic(using=using):
+                self._update_slug_paths(changes, using=using)
+
+
+def iter_changed_slug_paths(rows, stack=None):
+    """
+    Computes the `slug_path` of SlugTreeMixin nodes from
+    (pk, tree id, left, right, slug, has_url, slug_path) rows given in
+    tree order and yields (pk, new slug_path) for each changed node.
+
+    stack: Optional list of (tree id, right value, path prefix of the
+           children or None) of the ancestors of the first node, used
+           when starting below the roots.
+    """
+    stack = list(stack or [])
+    for pk, tree_id, left, right, slug, has_url, old_slug_path in rows:
+        while stack and (stack[-1][0] != tree_id or stack[-1][1] < left):
+            stack.pop()
+        prefix = stack[-1][2] if stack else None
+        # Same as "/".join(ancestor_slugs + [slug]), prefix None means no ancestor slugs
+        own = slug if prefix is None else prefix + "/" + slug
+        stack.append((tree_id, right, own if has_url else prefix))
+        slug_path = own if slug else (prefix or "")
+        if slug_path != old_slug_path:
+            yield pk, slug_path
 
 
-@receiver(pre_save)
 def slug_tree_mixin_pre_save(sender, instance, **kwargs):
-    if isinstance(instance, SlugTreeMixin):
-        # FIXME: find a way to not always call this
-        instance.slug = instance._meta.get_field('slug').pre_save(instance, False)
+    adding = instance._state.adding
+    if adding:
+        dirty_fields = instance.FIELDS_TO_CHECK
+    else:
+        dirty_fields = instance.get_dirty_fields(check_relationship=True).keys()
+    if not instance.slug or 'slug' in dirty_fields:
+        instance.slug = instance._meta.get_field('slug').pre_save(instance, adding)
+    if adding or dirty_fields or not instance.slug_path:
         instance.slug_path = instance._get_slug_path()
+        # Descendants only exist for nodes which have been saved before
+        instance._slug_tree_changed = not adding
 
 
-@receiver(post_save)
 def slug_tree_mixin_post_save(sender, instance, **kwargs):
-    if isinstance(instance, SlugTreeMixin):
-        if kwargs.get('created'):
-            # Always get a new database instance before saving again
-            # or MPTTModel.save() will interpret the newly .save as
-            # not allowed tree move action
-            # FIXME Not clear if this is a proper solution -> get rid of the slug_path stuff altogether
-            instance_copy = type(instance).objects.get(pk=instance.pk)
-            instance_copy.slug_path = instance_copy._get_slug_path()
-            if 'slug_path' in instance_copy.get_dirty_fields().keys():
-                instance_copy.save()
-        elif instance.get_dirty_fields().keys() & {'slug_path'}:
-            instance._rebuild_descendants_slug_path()
+    if instance.__dict__.pop('_slug_tree_changed', False):
+        instance._rebuild_descendants_slug_path()
+
+
+@receiver(class_prepared)
+def connect_slug_tree_mixin_signals(sender, **kwargs):
+    """
+    Connects the slug path receivers only to the concrete SlugTreeMixin
+    models (and their proxies) instead of every model.
+    """
+    if issubclass(sender, SlugTreeMixin) and not sender._meta.abstract:
+        pre_save.connect(slug_tree_mixin_pre_save, sender=sender)
+        post_save.connect(slug_tree_mixin_post_save, sender=sender)
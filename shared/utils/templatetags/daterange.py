@@ -7,6 +7,7 @@ import datetime
 from django import template
 from django.conf import settings
 from .. import dateformat
+from ..dateformat import memo_value_key
 
 
 DEFAULT_VARIANT = getattr(settings, 'DATEFORMAT_DEFAULT_VARIANT', 'SHORT')
@@ -23,7 +24,23 @@ def format_date_range(from_date, to_date, variant=DEFAULT_VARIANT):
     {% load date_range %}
     {% format_date_range start_date end_date %}
     """
-    return dateformat.format_date_range(from_date, to_date, variant)
+    return dateformat.memoize_rendered(
+        ('format_date_range', memo_value_key(from_date), memo_value_key(to_date),
+            dateformat.get_resolved_formats(variant=variant)),
+        lambda: dateformat.format_date_range(from_date, to_date, variant))
+
+
+@register.filter
+def format_date_ranges(pairs, variant=DEFAULT_VARIANT):
+    """
+    Formats a list of (from_date, to_date) pairs at once.
+
+    Use in django templates:
+
+    {% load date_range %}
+    {% for date_range in date_pairs|format_date_ranges %}
+    """
+    return list(dateformat.format_date_ranges(pairs, variant))
 
 
 @register.simple_tag
@@ -41,7 +58,13 @@ def format_time_range(from_time, to_time, variant=DEFAULT_VARIANT):
 
 @register.simple_tag
 def format_timespan_range(timespan_object, force_wholeday=False, variant=DEFAULT_VARIANT):
-    return dateformat.format_timespan_range(timespan_object, force_wholeday, variant)
+    return dateformat.memoize_rendered(
+        ('format_timespan_range',
+            memo_value_key(timespan_object.start_date), memo_value_key(timespan_object.end_date),
+            memo_value_key(timespan_object.start_time), memo_value_key(timespan_object.end_time),
+            timespan_object.is_multiday(), force_wholeday,
+            dateformat.get_resolved_formats(variant=variant)),
+        lambda: dateformat.format_timespan_range(timespan_object, force_wholeday, variant))
 
 
 @register.simple_tag
@@ -1,15 +1,32 @@
 from django import template
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
 from django.urls.exceptions import NoReverseMatch
-from django.urls import reverse
+from django.urls import get_script_prefix, reverse
 from django.utils.six.moves.urllib.parse import urlsplit, urlunsplit
 from django.utils.translation import override
 
+from ..lru import LRUCache
 from ..translation import get_translation, get_translated_field
 
 
+LANGUAGE_URL_CACHE_SIZE = getattr(settings, 'LANGUAGE_URL_CACHE_SIZE', 1024)
+
+
 register = template.Library()
 
 
+# (urlconf, script prefix, url name, args, kwargs, language) -> path
+language_url_cache = LRUCache(LANGUAGE_URL_CACHE_SIZE)
+
+
+@receiver(setting_changed)
+def _clear_language_url_cache(setting, **kwargs):
+    if setting in ('ROOT_URLCONF', 'LANGUAGES', 'LANGUAGE_CODE'):
+        language_url_cache.clear()
+
+
 @register.simple_tag(takes_context=True)
 def switch_language_url(context, lang_code: str):
     request = context['request']
@@ -29,6 +46,64 @@ def switch_language_url(context, lang_code: str):
     return url
 
 
+def _reverse_in_language(urlconf, url_name, args, kwargs, lang_code):
+    with override(lang_code):
+        try:
+            return reverse(url_name, urlconf=urlconf, args=args, kwargs=kwargs)
+        except NoReverseMatch:
+            return None
+
+
+@register.simple_tag(takes_context=True)
+def switch_language_urls(context):
+    """
+    Returns a list of dictionaries with `code`, `name` and `url` of the
+    current page for each language in settings.LANGUAGES. `url` is None
+    if the page cannot be reversed in this language, or if the request
+    did not resolve to a view (e.g. on 404 and 500 pages).
+
+    The reversed paths are cached per process (LANGUAGE_URL_CACHE_SIZE).
+
+    Usage::
+
+        {% switch_language_urls as language_urls %}
+        {% for language in language_urls %}
+            <a href="{{ language.url }}" hreflang="{{ language.code }}">{{ language.name }}</a>
+        {% endfor %}
+    """
+    request = context['request']
+    match = request.resolver_match
+    if match is None:
+        return [{'code': lang_code, 'name': name, 'url': None}
+                for lang_code, name in settings.LANGUAGES]
+    parsed_url = urlsplit(request.get_full_path())
+    urlconf = getattr(request, 'urlconf', None)
+    to_be_reversed = "%s:%s" % (match.namespace, match.url_name) \
+        if match.namespace else match.url_name
+    args = tuple(match.args)
+    key = (urlconf, get_script_prefix(), to_be_reversed, args, tuple(sorted(match.kwargs.items())))
+    try:
+        hash(key)
+    except TypeError:
+        key = None
+
+    languages = []
+    for lang_code, name in settings.LANGUAGES:
+        if key is None:
+            path = _reverse_in_language(urlconf, to_be_reversed, args, match.kwargs, lang_code)
+        else:
+            path = language_url_cache.get_or_set(
+                key + (lang_code,),
+                lambda: _reverse_in_language(urlconf, to_be_reversed, args, match.kwargs, lang_code))
+        if path is None:
+            url = None
+        else:
+            url = urlunsplit((parsed_url.scheme, parsed_url.netloc,
+                path, parsed_url.query, parsed_url.fragment))
+        languages.append({'code': lang_code, 'name': name, 'url': url})
+    return languages
+
+
 @register.filter
 def translation(obj):
     return get_translation(obj)
@@ -2,8 +2,11 @@
 from __future__ import unicode_literals
 
 import codecs
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
 import translitcodec  # provides 'translit/long', used by codecs.encode()
 import re
+import unicodedata
 
 from django.conf import settings
 from django.utils.encoding import force_text, smart_text
@@ -14,18 +17,67 @@ from django.utils.text import slugify as django_slugify
 from django.utils.translation import ugettext_lazy
 
 
+# Number of values memoized by downgrade, slugify_long and downgrading_slugify
+SLUGIFY_MEMO_SIZE = getattr(settings, 'SLUGIFY_MEMO_SIZE', 4096)
+
+
+if hasattr(str, 'isascii'):
+    _is_ascii = str.isascii
+else:
+    # Python < 3.7
+    def _is_ascii(value):
+        try:
+            value.encode('ascii')
+        except UnicodeEncodeError:
+            return False
+        return True
+
+
+# The translit/long codec normalizes to NFKC and translates with this
+# table; using the table directly saves the codec lookup
+TRANSLITERATION_TABLE = str.maketrans(translitcodec.long_table) \
+    if hasattr(translitcodec, 'long_table') else None
+
+HYPHENATE_RE = re.compile("[ _]+")
+
+# django_slugify without its keep_lazy wrapper, the values are text already
+_django_slugify = getattr(django_slugify, '__wrapped__', django_slugify)
+
+
+def _transliterate(value):
+    # The transliteration doesn't change ASCII characters. Return a plain
+    # str like the codec, str() would return e.g. SafeText unchanged
+    if _is_ascii(value):
+        return str.__str__(value)
+    if TRANSLITERATION_TABLE is None:
+        return codecs.encode(value, 'transliterate')
+    return unicodedata.normalize('NFKC', value).translate(TRANSLITERATION_TABLE)
+
+
+def _slugify_transliterated(value):
+    return _django_slugify(_transliterate(value))
+
+
+def _downgrading_slugify_transliterated(value):
+    return HYPHENATE_RE.sub("-", _django_slugify(_transliterate(value)))
+
+
+_downgrade = lru_cache(maxsize=SLUGIFY_MEMO_SIZE)(_transliterate)
+_slugify_long = lru_cache(maxsize=SLUGIFY_MEMO_SIZE)(_slugify_transliterated)
+_downgrading_slugify = lru_cache(maxsize=SLUGIFY_MEMO_SIZE)(_downgrading_slugify_transliterated)
+
+
 @keep_lazy_text
 def downgrade(value):
     """
     Downgrade unicode to ascii, transliterating accented characters.
     """
-    value = force_text(value or "")
-    return codecs.encode(value, 'transliterate')
+    return _downgrade(force_text(value or ""))
 
 
 @keep_lazy_text
 def slugify_long(value):
-    return django_slugify(downgrade(value))
+    return _slugify_long(force_text(value or ""))
 
 
 # Spreading umlauts is included in the translit/long codec.
@@ -36,13 +88,65 @@ slugify_german = slugify_long
 def downgrading_slugify(value):
     # Slugfiy only allowing hyphens, numbers and ASCII characters
     # FIXME django_slugify might return an empty string; take care that we always return something
-    return re.sub("[ _]+", "-", django_slugify(downgrade(value)))
+    return _downgrading_slugify(force_text(value or ""))
+
+
+def clear_slugify_memo():
+    """
+    Clears the memoized results of downgrade, slugify_long and
+    downgrading_slugify.
+    """
+    _downgrade.cache_clear()
+    _slugify_long.cache_clear()
+    _downgrading_slugify.cache_clear()
 
 
 SLUGIFY_FUNCTION = getattr(settings, 'SLUGIFY_FUNCTION', downgrading_slugify)
 slugify = SLUGIFY_FUNCTION
 
 
+# Functions used by batch_slugify instead of the public ones, skipping
+# the lazy wrapper and the memo
+BATCH_FUNCTIONS = {
+    downgrade: _transliterate,
+    slugify_long: _slugify_transliterated,
+    downgrading_slugify: _downgrading_slugify_transliterated,
+}
+
+
+def batch_slugify(values, function=None, processes=None):
+    """
+    Applies a slugify function (default: settings.SLUGIFY_FUNCTION) to an
+    iterable of values and returns the list of results, each value
+    computed only once. Same results as calling the function per value.
+
+    function: downgrade, slugify_long, downgrading_slugify or any other
+              function taking a text value
+    processes: Spread the unique values over a pool of this many processes,
+               only worth it for very large batches; `function` has to be
+               picklable
+    """
+    function = function or SLUGIFY_FUNCTION
+    values = [force_text(value or "") for value in values]
+    unique_values = list(dict.fromkeys(values))
+    function = BATCH_FUNCTIONS.get(function, function)
+    if processes and processes > 1 and len(unique_values) > 1:
+        chunksize = max(1, len(unique_values) // (processes * 4))
+        with ProcessPoolExecutor(max_workers=processes) as executor:
+            results = list(executor.map(function, unique_values, chunksize=chunksize))
+    else:
+        results = [function(value) for value in unique_values]
+    results = dict(zip(unique_values, results))
+    return [results[value] for value in values]
+
+
+def batch_downgrade(values, processes=None):
+    """
+    Batch version of downgrade, see batch_slugify.
+    """
+    return batch_slugify(values, downgrade, processes=processes)
+
+
 if six.PY2:
     import bs4
 
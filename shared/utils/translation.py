@@ -2,42 +2,152 @@
 from __future__ import unicode_literals
 
 from copy import copy
+import asyncio
+import contextvars
 import os
+import threading
+import time
 
 from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, wait
 from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import lru_cache
+import django
 from django.conf import settings
-from django.core.exceptions import ObjectDoesNotExist, FieldDoesNotExist
+from django.core.exceptions import FieldDoesNotExist, ImproperlyConfigured
+from django.core.signals import setting_changed
+from django.db import close_old_connections
+from django.db.models import F, Prefetch, Value
+from django.db.models.expressions import OrderBy
+from django.db.models.functions import Coalesce, NullIf
+from django.dispatch import receiver
+from django.template import engines
 from django.template.loader import select_template
+from django.template.loaders.cached import Loader as CachedLoader
 from django.utils import translation
+from django.utils.autoreload import file_changed
+from django.utils.decorators import classonlymethod
+from django.utils.translation import trans_real
 from django.views.generic import TemplateView
 from django.views.i18n import set_language
 
 
 FALLBACK_LANGUAGE_CODE = getattr(settings, 'FALLBACK_LANGUAGE_CODE', 'en')
+EXTRA_CONTEXT_MAX_WORKERS = getattr(settings, 'EXTRA_CONTEXT_MAX_WORKERS', 8)
 
+# Django calls async `get` handlers of class based views since 4.1
+ASYNC_VIEWS_SUPPORTED = django.VERSION >= (4, 1)
 
-def _normalize_language_code(language_code):
-    """
-    Makes sure the language code is not an empty string.
-    """
+
+# (active translation, language code, language code without region),
+# see set_request_language
+_request_language = ContextVar('request_language', default=None)
+
+
+def _get_active_translation():
+    # Changes with every translation.activate(), override() or deactivate()
+    return getattr(trans_real._active, 'value', None)
+
+
+def _resolve_language_code():
     return (
-        language_code or
         translation.get_language() or
         settings.LANGUAGE_CODE or
         FALLBACK_LANGUAGE_CODE
     )
 
 
+def set_request_language():
+    """
+    Resolves the active language once and stores it in a context variable
+    for the current request (or task, or thread), so that get_language and
+    friends can read it without resolving it again. Used by
+    shared.utils.middleware.request_language_middleware and active_language.
+
+    Returns a token for reset_request_language.
+    """
+    language_code = _resolve_language_code()
+    return _request_language.set(
+        (_get_active_translation(), language_code, language_code.split("-")[0]))
+
+
+def reset_request_language(token):
+    _request_language.reset(token)
+
+
+def _get_request_language():
+    request_language = _request_language.get()
+    # Only valid as long as no other language has been activated since
+    if request_language is not None and request_language[0] is _get_active_translation():
+        return request_language
+    return None
+
+
+def _normalize_language_code(language_code):
+    """
+    Makes sure the language code is not an empty string.
+    """
+    if language_code:
+        return language_code
+    request_language = _get_request_language()
+    if request_language is not None:
+        return request_language[1]
+    return _resolve_language_code()
+
+
 def get_language(language_code=None):
+    if not language_code:
+        request_language = _get_request_language()
+        if request_language is not None:
+            return request_language[2]
     return _normalize_language_code(language_code).split("-")[0]
 
 
+@lru_cache(maxsize=None)
+def get_language_codes():
+    """
+    Returns the language codes of settings.LANGUAGES.
+    """
+    return tuple(OrderedDict(settings.LANGUAGES).keys())
+
+
+@lru_cache(maxsize=None)
+def get_fallback_chain(language_code):
+    """
+    Returns a tuple of the (normalized) language code followed by its
+    fallback languages, in the order translations should be looked up.
+
+    The fallbacks are configured per language in the
+    TRANSLATION_FALLBACK_LANGUAGES setting, e.g.::
+
+        TRANSLATION_FALLBACK_LANGUAGES = {
+            'de': ['en'],
+            'fr': ['en', 'de'],
+            'default': ['en'],
+        }
+
+    Languages without an entry use the 'default' entry or, if there is
+    none, all other languages of settings.LANGUAGES.
+    """
+    language_code = language_code.split("-")[0]
+    configured = getattr(settings, 'TRANSLATION_FALLBACK_LANGUAGES', {})
+    fallbacks = configured.get(language_code, configured.get('default'))
+    if fallbacks is None:
+        fallbacks = get_language_codes()
+    chain = [language_code]
+    for code in fallbacks:
+        code = code.split("-")[0]
+        if code not in chain:
+            chain.append(code)
+    return tuple(chain)
+
+
 def get_language_order(languages=None):
     """
     Returns a copy of settings.LANGUAGES with the active language at the first position.
     """
-    languages = languages or list(OrderedDict(settings.LANGUAGES).keys())
+    languages = languages or list(get_language_codes())
     languages.insert(0, languages.pop(languages.index(get_language())))
     return languages
 
@@ -54,104 +164,401 @@ def lang_suffix(language_code=None, field_name=None, fieldname=None):
     return "{}_{}".format(field_name or fieldname or "", language_code)
 
 
+_extra_context_executor = None
+_extra_context_executor_lock = threading.Lock()
+
+
+def _get_extra_context_executor():
+    global _extra_context_executor
+    with _extra_context_executor_lock:
+        if _extra_context_executor is None:
+            _extra_context_executor = ThreadPoolExecutor(
+                max_workers=EXTRA_CONTEXT_MAX_WORKERS, thread_name_prefix='extra_context')
+        return _extra_context_executor
+
+
 class DirectTemplateView(TemplateView):
+    """
+    Template view which adds extra_context to the context, calling the
+    callable values.
+
+    With concurrent_extra_context = True, the callables are called
+    concurrently in a thread pool shared by all views (sized by the
+    EXTRA_CONTEXT_MAX_WORKERS setting). Each call runs with a copy of the
+    request's context variables and the active language; if several
+    callables fail, the exception of the first one in extra_context is
+    raised.
+    """
     extra_context = None
+    concurrent_extra_context = False
 
     def get_context_data(self, **kwargs):
         context = super(DirectTemplateView, self).get_context_data(**kwargs)
         if self.extra_context is not None:
-            for key, value in self.extra_context.items():
-                if callable(value):
-                    context[key] = value()
-                else:
-                    context[key] = value
+            context.update(self.get_extra_context())
         return context
 
+    def get_extra_context(self):
+        values = {}
+        calls = []
+        for key, value in self.extra_context.items():
+            if callable(value):
+                calls.append((key, value))
+            else:
+                values[key] = value
+
+        if self.concurrent_extra_context and len(calls) > 1:
+            executor = _get_extra_context_executor()
+            futures = [
+                (key, executor.submit(
+                    contextvars.copy_context().run,
+                    self._call_extra_context_in_thread, key, func, translation.get_language()))
+                for key, func in calls]
+            wait([future for key, future in futures])
+            for key, future in futures:
+                values[key] = future.result()
+        else:
+            for key, func in calls:
+                values[key] = self.call_extra_context(key, func)
+        return values
+
+    def _call_extra_context_in_thread(self, key, func, language_code):
+        close_old_connections()
+        try:
+            with translation.override(language_code):
+                return self.call_extra_context(key, func)
+        finally:
+            close_old_connections()
+
+    def call_extra_context(self, key, func):
+        start = time.perf_counter()
+        try:
+            return func()
+        finally:
+            self.extra_context_timing(key, time.perf_counter() - start)
+
+    def extra_context_timing(self, key, duration):
+        """
+        Hook called with the duration (in seconds) of each extra_context callable.
+        """
+        pass
+
+
+class AsyncDirectTemplateView(DirectTemplateView):
+    """
+    Async variant of DirectTemplateView: The extra_context callables are
+    awaited concurrently with asyncio.gather. Coroutine functions are
+    awaited directly, other callables run in worker threads
+    (sync_to_async). If several callables fail, the exception of the
+    first one in extra_context is raised.
+
+    Requires Django 4.1 or later (async class based views), as_view raises
+    ImproperlyConfigured on older versions.
+    """
+
+    @classonlymethod
+    def as_view(cls, **initkwargs):
+        if not ASYNC_VIEWS_SUPPORTED:
+            raise ImproperlyConfigured(
+                "{} requires Django 4.1 or later (async class based views).".format(cls.__name__))
+        return super().as_view(**initkwargs)
+
+    async def get(self, request, *args, **kwargs):
+        context = await self.aget_context_data(**kwargs)
+        return self.render_to_response(context)
+
+    async def aget_context_data(self, **kwargs):
+        context = self.get_context_data(**kwargs)
+        if self.extra_context is not None:
+            context.update(await self.aget_extra_context())
+        return context
+
+    def get_extra_context(self):
+        # Callables are resolved in aget_extra_context
+        return {key: value for key, value in self.extra_context.items() if not callable(value)}
+
+    async def aget_extra_context(self):
+        from asgiref.sync import sync_to_async
+
+        keys = []
+        calls = []
+        for key, value in self.extra_context.items():
+            if asyncio.iscoroutinefunction(value):
+                keys.append(key)
+                calls.append(self.acall_extra_context(key, value))
+            elif callable(value):
+                keys.append(key)
+                calls.append(sync_to_async(self._call_extra_context_in_thread, thread_sensitive=False)(
+                    key, value, translation.get_language()))
+
+        results = await asyncio.gather(*calls, return_exceptions=True)
+        for result in results:
+            if isinstance(result, BaseException):
+                raise result
+        return dict(zip(keys, results))
+
+    async def acall_extra_context(self, key, func):
+        start = time.perf_counter()
+        try:
+            return await func()
+        finally:
+            self.extra_context_timing(key, time.perf_counter() - start)
+
+
+# (template_name, language) -> name of the selected template
+_i18n_template_names = {}
+
+
+@lru_cache(maxsize=None)
+def _template_loaders_cached():
+    """
+    Returns True if all template engines use the cached template loader,
+    i.e. templates do not change while the process is running.
+    """
+    for engine in engines.all():
+        loaders = getattr(getattr(engine, 'engine', None), 'template_loaders', None)
+        if not loaders or not all(isinstance(loader, CachedLoader) for loader in loaders):
+            return False
+    return True
+
+
+def clear_i18n_template_cache(**kwargs):
+    _i18n_template_names.clear()
+    _template_loaders_cached.cache_clear()
+
+
+@receiver(setting_changed)
+def _clear_i18n_template_cache_on_setting_changed(setting, **kwargs):
+    if setting in ('TEMPLATES', 'DEBUG'):
+        clear_i18n_template_cache()
+
+
+file_changed.connect(clear_i18n_template_cache)
+
 
 class I18nDirectTemplateView(DirectTemplateView):
+    """
+    Uses the template "<name>.<language><ext>" if it exists, otherwise
+    template_name.
+
+    The selected name is cached per language, unless the template loaders
+    are not cached (e.g. with DEBUG = True).
+    """
+
     def get_template_names(self):
-        t_name, t_ext = os.path.splitext(self.template_name)
         lang = translation.get_language()
+        use_cache = _template_loaders_cached()
+        if use_cache:
+            try:
+                return [_i18n_template_names[(self.template_name, lang)]]
+            except KeyError:
+                pass
+        t_name, t_ext = os.path.splitext(self.template_name)
         template = select_template([
             "%s.%s%s" % (t_name, lang, t_ext),
             self.template_name
         ])
-        return [template.template.name]
+        name = template.template.name
+        if use_cache:
+            _i18n_template_names[(self.template_name, lang)] = name
+        return [name]
+
+
+class AsyncI18nDirectTemplateView(I18nDirectTemplateView, AsyncDirectTemplateView):
+    """
+    Async variant of I18nDirectTemplateView, requires Django 4.1 or later.
+    """
+    pass
 
 
 def get_translation(obj, relation_name='translations', language_code=None):
+    """
+    Returns the related translation object for the language, or for the
+    first of its fallback languages which exists (see get_fallback_chain).
+
+    Uses the translations prefetched by prefetch_translations (or any other
+    prefetch_related of the relation) without querying the database,
+    otherwise fetches the translations of all fallback languages with a
+    single query.
+    """
     language_code = _normalize_language_code(language_code).split("-")[0]
-    try:
-        return getattr(obj, relation_name).get(language=language_code)
-    except ObjectDoesNotExist:
-        # FIXME Fetch best possible language from settings.LANGUAGES
-        try:
-            return getattr(obj, relation_name).get(language=(language_code == 'en' and 'de' or 'en'))
-        except ObjectDoesNotExist:
-            return None
+    languages = get_fallback_chain(language_code)
 
+    related = getattr(obj, relation_name)
+    if isinstance(related, list):
+        # Prefetch(to_attr=...)
+        translations = related
+    else:
+        translations = getattr(obj, '_prefetched_objects_cache', {}).get(relation_name)
+    if translations is None:
+        # Fetch all fallback languages at once
+        translations = related.filter(language__in=languages)
+
+    by_language = {t.language: t for t in translations}
+    for language in languages:
+        if language in by_language:
+            return by_language[language]
+    return None
 
-def get_translated_field(obj, field_name, language_code=None):
-    """
-    Tries to get the model attribute corresponding to the current
-    selected language by appending "_<language_code>" to the attribute
-    name and returning the value.
 
-    On AttributeError try to return the other language or the attribute
-    without the language suffix.
+def prefetch_translations(queryset, relation_name='translations', language_code=None):
+    """
+    Prefetches the translations of the language and its fallback languages
+    in a single query, so that get_translation (and the `translation`
+    template filter) do not query the database for each object.
+    """
+    language_code = _normalize_language_code(language_code).split("-")[0]
+    translation_model = getattr(queryset.model, relation_name).field.model
+    return queryset.prefetch_related(Prefetch(
+        relation_name,
+        queryset=translation_model._default_manager.filter(
+            language__in=get_fallback_chain(language_code))))
 
-    If the attribute is empty or null, try to return the value of
-    the other language's attribute.
 
-    If there is an attribute with the name without any language code
-    extension, return the value of this.
+@lru_cache(maxsize=None)
+def get_translated_field_plan(model, field_name, language_code, db_fields_only=False):
+    """
+    Returns the attribute names get_translated_field tries for this model,
+    field and language, in fallback order:
 
-    Best return value:
-        field_name + lang_suffix for current language
+        field_name + lang_suffix for the language
 
-    If empty or field does not exist:
-        if default language and field_name
+    If empty or the attribute does not exist:
+        if default language and field_name is a database field
             field_name
         else
-            field_name + lang_suffix other language
+            field_name + lang_suffix of the fallback languages (see get_fallback_chain)
+
+    If still empty and field_name is a database field:
+        field_name
+
+    Attributes are looked up on the model class; only database fields are
+    considered for the field name without suffix (to avoid recursion).
     """
-    # TODO Implement multiple languages
-    language_code = _normalize_language_code(language_code).split("-")[0]
     is_default_language = bool(language_code == settings.LANGUAGE_CODE.split("-")[0])
-    if language_code == 'de':
-        other_language_code = 'en'
-    else:
-        other_language_code = 'de'
 
-    def has_db_field(field_name):
+    def has_db_field(name):
         try:
-            # Only try to access database fields to avoid recursion
-            obj._meta.get_field(field_name)
+            model._meta.get_field(name)
             return True
         except FieldDoesNotExist:
             return False
 
+    if db_fields_only:
+        has_attribute = has_db_field
+    else:
+        def has_attribute(name):
+            return hasattr(model, name)
+
+    names = []
     translated_field_name = '%s_%s' % (field_name, language_code)
-    other_translated_field_name = '%s_%s' % (field_name, other_language_code)
+    if has_attribute(translated_field_name):
+        names.append(translated_field_name)
+    if is_default_language and has_db_field(field_name):
+        names.append(field_name)
+    else:
+        for other_language_code in get_fallback_chain(language_code)[1:]:
+            other_translated_field_name = '%s_%s' % (field_name, other_language_code)
+            if has_attribute(other_translated_field_name):
+                names.append(other_translated_field_name)
+    if field_name not in names and has_db_field(field_name):
+        names.append(field_name)
+    return tuple(names)
+
+
+@receiver(setting_changed)
+def _reset_language_caches(setting, **kwargs):
+    if setting in ('LANGUAGES', 'LANGUAGE_CODE', 'TRANSLATION_FALLBACK_LANGUAGES'):
+        get_language_codes.cache_clear()
+        get_fallback_chain.cache_clear()
+        get_translated_field_plan.cache_clear()
+
+
+def get_translated_field(obj, field_name, language_code=None):
+    """
+    Tries to get the model attribute corresponding to the current
+    selected language by appending "_<language_code>" to the attribute
+    name and returning the value.
+
+    If the attribute does not exist or is empty or null, try to return
+    the value of the attribute without language suffix (for the default
+    language) or of the fallback languages' attributes.
+
+    If there is a database field with the name without any language code
+    extension, return the value of this as last resort.
+
+    The attribute names to try are computed once per model class, field name
+    and language, see get_translated_field_plan.
+    """
+    language_code = _normalize_language_code(language_code).split("-")[0]
     rv = ""
-    if hasattr(obj, translated_field_name):
-        rv = getattr(obj, translated_field_name)
-    if not rv:
-        if is_default_language and has_db_field(field_name):
-            rv = getattr(obj, field_name)
-        elif hasattr(obj, other_translated_field_name):
-            rv = getattr(obj, other_translated_field_name)
-    if not rv and has_db_field(field_name):
-        rv = getattr(obj, field_name)
+    for name in get_translated_field_plan(type(obj), field_name, language_code):
+        rv = getattr(obj, name)
+        if rv:
+            break
     # FIXME Raise error if neither field exists
     return rv
 
 
+class TranslatedField(object):
+    """
+    Query expression for the value get_translated_field returns, for use
+    in annotate() and order_by(), and in filter() on the annotation.
+
+    Usage::
+
+        Article.objects.annotate(title=TranslatedField('name')).order_by('title')
+        Article.objects.order_by(TranslatedField('name').desc())
+
+    Only database fields are considered; empty strings count as missing
+    values, as in get_translated_field.
+    """
+    contains_aggregate = False
+
+    def __init__(self, field_name, language_code=None):
+        self.field_name = field_name
+        self.language_code = language_code
+
+    def __repr__(self):
+        return "{}({!r})".format(self.__class__.__name__, self.field_name)
+
+    def get_field_names(self, model):
+        """
+        Returns the database field names in the fallback order of get_translated_field.
+        """
+        language_code = _normalize_language_code(self.language_code).split("-")[0]
+        return get_translated_field_plan(model, self.field_name, language_code, db_fields_only=True)
+
+    def get_expression(self, model):
+        field_names = self.get_field_names(model)
+        if not field_names:
+            return Value("")
+        # The last value is returned as it is, even if empty
+        expressions = [NullIf(F(name), Value("")) for name in field_names[:-1]] + [F(field_names[-1])]
+        if len(expressions) == 1:
+            return expressions[0]
+        return Coalesce(*expressions, output_field=model._meta.get_field(field_names[0]))
+
+    def resolve_expression(self, query=None, allow_joins=True, reuse=None, summarize=False, for_save=False):
+        return self.get_expression(query.model).resolve_expression(
+            query, allow_joins, reuse, summarize, for_save)
+
+    def asc(self, **kwargs):
+        return OrderBy(self, **kwargs)
+
+    def desc(self, **kwargs):
+        return OrderBy(self, descending=True, **kwargs)
+
+
 @contextmanager
 def active_language(lang='de'):
     translation.activate(lang)
-    yield
-    translation.deactivate()
+    token = set_request_language()
+    try:
+        yield
+    finally:
+        reset_request_language(token)
+        translation.deactivate()
 
 
 def set_language_get(request):
@@ -174,6 +581,9 @@ class I18nUrlMixin(object):
             ...
 
         url(r'<your_pattern>', ViewClass.as_view(view_name='my-wonderful-view', name='my-wonderful-view'),
+
+    Works with async views, too (e.g. AsyncDirectTemplateView), as
+    their aget_context_data builds on get_context_data.
     """
     view_name = None
 
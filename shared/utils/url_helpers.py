@@ -1,3 +1,7 @@
+import asyncio
+
+import django
+from django.core.exceptions import ImproperlyConfigured
 from django.http import Http404
 
 
@@ -31,3 +35,44 @@ def dispatch_slug_path(*views):
         raise not_found_exception
 
     return wrapper
+
+
+def adispatch_slug_path(*views):
+    """
+    Async variant of dispatch_slug_path: Async views are awaited, sync
+    views run through sync_to_async. Requires Django 3.1 or later (async
+    views), 4.1 for async class based views.
+
+    Usages::
+
+        # in urls.py
+        path('<slug:slug_path>/', adispatch_slug_path(
+            views.AsyncCategoryDetailView.as_view(),
+            views.ArticleDetailView.as_view())),
+        )
+    """
+    if django.VERSION < (3, 1):
+        raise ImproperlyConfigured("adispatch_slug_path requires Django 3.1 or later (async views).")
+
+    from asgiref.sync import sync_to_async
+
+    async def wrapper(request, slug_path):
+        args = []
+        kwargs = {'slug_path': slug_path}
+
+        not_found_exception = Http404
+        for view in views:
+            try:
+                if asyncio.iscoroutinefunction(view):
+                    return await view(request, *args, **kwargs)
+                response = await sync_to_async(view)(request, *args, **kwargs)
+                if asyncio.iscoroutine(response):
+                    # Async view not marked as coroutine function
+                    response = await response
+                return response
+            except Http404 as e:
+                not_found_exception = e  # assign to use it outside of except block
+                continue
+        raise not_found_exception
+
+    return wrapper
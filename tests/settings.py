@@ -0,0 +1,38 @@
+"""
+Settings for the test suite, run from the repository root with
+
+    python -m django test tests --settings=tests.settings
+"""
+
+import os
+
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+SECRET_KEY = 'tests'
+DEBUG = False
+ALLOWED_HOSTS = ['testserver']
+
+# shared.utils is not installed, its template tags do not import on
+# recent Django versions
+INSTALLED_APPS = [
+    'django.contrib.contenttypes',
+]
+
+DATABASES = {}
+
+MIDDLEWARE = [
+    'django.middleware.locale.LocaleMiddleware',
+    'shared.utils.middleware.request_language_middleware',
+]
+
+ROOT_URLCONF = 'tests.urls'
+
+USE_I18N = True
+LANGUAGE_CODE = 'en'
+LANGUAGES = [('de', 'German'), ('en', 'English')]
+
+TEMPLATES = [{
+    'BACKEND': 'django.template.backends.django.DjangoTemplates',
+    'DIRS': [os.path.join(BASE_DIR, 'templates')],
+}]
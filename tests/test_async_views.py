@@ -0,0 +1,63 @@
+from unittest import skipIf, skipUnless
+
+from django.core.exceptions import ImproperlyConfigured
+from django.test import SimpleTestCase
+
+from shared.utils.translation import ASYNC_VIEWS_SUPPORTED, AsyncDirectTemplateView
+
+
+def accept_language(language):
+    """
+    Returns the AsyncClient keyword arguments for an Accept-Language header
+    (extra arguments are added as ASGI header names).
+    """
+    return {'accept-language': language}
+
+
+@skipUnless(ASYNC_VIEWS_SUPPORTED, "Async class based views require Django 4.1")
+class AsyncViewsTests(SimpleTestCase):
+    """
+    Runs the async views through the ASGI test client, with
+    LocaleMiddleware and request_language_middleware.
+    """
+
+    async def test_direct_template_view(self):
+        response = await self.async_client.get('/async/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.content.decode().strip(), "en: Hello Page 3")
+
+    async def test_direct_template_view_language(self):
+        response = await self.async_client.get('/async/', **accept_language('de'))
+        self.assertEqual(response.content.decode().strip(), "de: Hello Page 3")
+
+    async def test_i18n_template(self):
+        response = await self.async_client.get('/i18n/', **accept_language('de'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.content.decode().strip(), "de page de: Hello Page 3")
+
+    async def test_i18n_template_fallback(self):
+        response = await self.async_client.get('/i18n/', **accept_language('en'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.content.decode().strip(), "en: Hello Page 3")
+
+    async def test_dispatch_slug_path_async_view(self):
+        response = await self.async_client.get('/category/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.content, b"category")
+
+    async def test_dispatch_slug_path_sync_view(self):
+        response = await self.async_client.get('/article/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.content, b"article")
+
+    async def test_dispatch_slug_path_not_found(self):
+        response = await self.async_client.get('/missing/')
+        self.assertEqual(response.status_code, 404)
+
+
+@skipIf(ASYNC_VIEWS_SUPPORTED, "Async class based views are supported")
+class UnsupportedAsyncViewsTests(SimpleTestCase):
+
+    def test_as_view(self):
+        with self.assertRaises(ImproperlyConfigured):
+            AsyncDirectTemplateView.as_view(template_name='tests/page.html')
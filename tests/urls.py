@@ -0,0 +1,46 @@
+from django.http import Http404, HttpResponse
+from django.urls import path
+
+from shared.utils.translation import (
+    ASYNC_VIEWS_SUPPORTED, AsyncDirectTemplateView, AsyncI18nDirectTemplateView, get_language)
+from shared.utils.url_helpers import adispatch_slug_path
+
+
+async def greeting():
+    return "Hello"
+
+
+def title():
+    return "Page"
+
+
+EXTRA_CONTEXT = {
+    'greeting': greeting,
+    'title': title,
+    'count': 3,
+    'language': get_language,
+}
+
+
+async def category_view(request, slug_path):
+    if slug_path != 'category':
+        raise Http404("No category")
+    return HttpResponse("category")
+
+
+def article_view(request, slug_path):
+    if slug_path != 'article':
+        raise Http404("No article")
+    return HttpResponse("article")
+
+
+# The async views raise ImproperlyConfigured on older Django versions
+urlpatterns = []
+if ASYNC_VIEWS_SUPPORTED:
+    urlpatterns += [
+        path('async/', AsyncDirectTemplateView.as_view(
+            template_name='tests/page.html', extra_context=EXTRA_CONTEXT)),
+        path('i18n/', AsyncI18nDirectTemplateView.as_view(
+            template_name='tests/page.html', extra_context=EXTRA_CONTEXT)),
+        path('<slug:slug_path>/', adispatch_slug_path(category_view, article_view)),
+    ]